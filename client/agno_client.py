@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # client.py
 import os
-import sys
 import asyncio
 import logging
 import argparse
@@ -11,36 +10,29 @@ from agno.tools.mcp import MCPTools
 from mcp import ClientSession
 from rich.console import Console
 from rich.prompt import Prompt
+from rich.text import Text
 from rich.theme import Theme
 from typing import Optional
 from contextlib import AsyncExitStack
 from mcp import ClientSession
-from mcp.client.sse import sse_client
 from dotenv import load_dotenv
-
-# Silence all logging
-class SilentFilter(logging.Filter):
-    def filter(self, record):
-        return False
-
-# Configure root logger to be silent
-root_logger = logging.getLogger()
-root_logger.addFilter(SilentFilter())
-root_logger.setLevel(logging.CRITICAL)
-
-# Silence specific loggers
-for logger_name in ['agno', 'httpx', 'urllib3', 'asyncio']:
-    logger = logging.getLogger(logger_name)
-    logger.addFilter(SilentFilter())
-    logger.setLevel(logging.CRITICAL)
-    logger.propagate = False
-
-# Redirect stdout/stderr for the agno library
-class DevNull:
-    def write(self, msg): pass
-    def flush(self): pass
-
-sys.stderr = DevNull()
+# Sibling modules: relative imports when loaded as the client package,
+# plain imports when run as a script (python client/agno_client.py)
+if __package__:
+    from .event_loop import run
+    from .prompts import ZERODHA_SYSTEM_PROMPT, PROMPT_CACHE_KEY, with_timestamp
+    from .sse_utils import open_sse_session
+    from .tool_cache import install_tool_cache, pin_tool_list
+else:
+    from event_loop import run
+    from prompts import ZERODHA_SYSTEM_PROMPT, PROMPT_CACHE_KEY, with_timestamp
+    from sse_utils import open_sse_session
+    from tool_cache import install_tool_cache, pin_tool_list
+
+# Silence all logging. logging.disable short-circuits every logger call
+# before a record is built, so library logging costs next to nothing.
+logging.disable(logging.CRITICAL)
+logging.getLogger().addHandler(logging.NullHandler())
 
 # Define custom theme
 custom_theme = Theme({
@@ -57,8 +49,24 @@ custom_theme = Theme({
 # Initialize rich console with custom theme
 console = Console(theme=custom_theme)
 
+# Pre-parsed markup for the text printed on every turn
+QUERY_PROMPT = Text.from_markup("[query]Enter your query:[/query] [dim](or 'quit' to exit)[/dim]")
+WELCOME_MESSAGE = Text.from_markup("[info]Welcome to Zerodha! I'm here to assist you with managing your trading account, orders, portfolio, and positions. How can I help you today?[/info]")
+USER_LABEL = Text.from_markup("[user]You:[/user] ")
+ASSISTANT_LABEL = Text.from_markup("[assistant]Assistant:[/assistant] ")
+
 load_dotenv()
 
+# Maximum time (in seconds) streamed chunks are buffered before being written
+STREAM_FLUSH_INTERVAL = 0.05
+
+def style_codes(style_name: str) -> tuple[str, str]:
+    """Return the escape sequences that switch a theme style on and off"""
+    with console.capture() as capture:
+        console.print("|", style=style_name, end="", markup=False, highlight=False)
+    style_on, _, style_off = capture.get().partition("|")
+    return style_on, style_off
+
 class MCPClient:
     def __init__(self):
         # Initialize session and client objects
@@ -67,25 +75,15 @@ class MCPClient:
 
     async def connect_to_sse_server(self, server_url: str):
         """Connect to an MCP server running with SSE transport"""
-        # Store the context managers so they stay alive
-        self._streams_context = sse_client(url=server_url)
-        streams = await self._streams_context.__aenter__()
-
-        self._session_context = ClientSession(*streams)
-        self.session: ClientSession = await self._session_context.__aenter__()
-
-        # Initialize
-        await self.session.initialize()
+        self.session = await open_sse_session(server_url, self.exit_stack)
+        install_tool_cache(self.session)
 
-        # List available tools to verify connection
-        response = await self.session.list_tools()
+        # List available tools to verify connection; later calls reuse the result
+        await pin_tool_list(self.session)
 
     async def cleanup(self):
         """Properly clean up the session and streams"""
-        if self._session_context:
-            await self._session_context.__aexit__(None, None, None)
-        if self._streams_context:
-            await self._streams_context.__aexit__(None, None, None)
+        await self.exit_stack.aclose()
 
     async def disconnect(self):
         """Disconnect from the MCP server"""
@@ -106,37 +104,15 @@ async def main():
     mcp_client = MCPClient()
     await mcp_client.connect_to_sse_server(mcp_url)
 
-    # List available tools
-    response = await mcp_client.session.list_tools()
     mcp_tools = MCPTools(session=mcp_client.session)
     await mcp_tools.initialize()
 
     # Create the Agno agent with Gemini model
     agent = Agent(
-        instructions="""
-You are a Zerodha Trading Account Assistant, helping users securely manage their accounts, orders, portfolio, and positions using tools provided over MCP.
-
-# Important Instructions:
-- ALWAYS respond in plain text. NEVER use markdown formatting (no asterisks, hashes, or code blocks).
-- Respond in human-like conversational, friendly, and professional tone in concise manner.
-
-# Authentication Steps (must be followed if no access token is generated):
-1. Use the 'get_login_url' tool to generate a Kite login URL and ask the user to log in and send the request token to you. Use this tool automatically when the user is not authenticated.
-2. Use the 'get_access_token' tool with the request token to generate and validate the access token.
-3. Proceed only if the access token is valid.
-
-# Responsibilities:
-- Check if the user is authenticated (e.g., by calling 'get_user_profile').
-- Assist with order placement ('place_order'), modification ('modify_order'), and cancellation ('cancel_order').
-- Provide insights on portfolio holdings ('get_holdings'), positions ('get_positions'), and available margin ('get_margins').
-- Track order status ('get_orders'), execution details ('get_order_trades'), and trade history ('get_order_history').
-- Any more tools can be used if needed.
-
-# Limitations:
-You do not provide real-time market quotes, historical data, or financial advice. Your role is to ensure secure, efficient, and compliant account management.
-""",
+        instructions=ZERODHA_SYSTEM_PROMPT,
         model=OpenAIChat(
-            id="gpt-4o"
+            id="gpt-4o",
+            request_params={"extra_body": {"prompt_cache_key": PROMPT_CACHE_KEY}}
         ),
         add_history_to_messages=True,
         num_history_responses=10,
@@ -147,37 +123,59 @@ You do not provide real-time market quotes, historical data, or financial advice
         read_chat_history=True,
         tool_call_limit=10,
         telemetry=False,
-        add_datetime_to_instructions=True
+        add_datetime_to_instructions=False
     )
 
+    loop = asyncio.get_running_loop()
+    response_style_on, response_style_off = style_codes("response")
+
     # Welcome message
     console.print()
-    console.print("[info]Welcome to Zerodha! I'm here to assist you with managing your trading account, orders, portfolio, and positions. How can I help you today?[/info]", style="response")
+    console.print(WELCOME_MESSAGE, style="response")
 
     try:
         while True:
             # Add spacing before the prompt
             console.print()
             # Get user input with rich prompt
-            user_query = Prompt.ask("[query]Enter your query:[/query] [dim](or 'quit' to exit)[/dim]")
+            user_query = Prompt.ask(QUERY_PROMPT, console=console)
 
             # Check if user wants to quit
             if user_query.lower() == 'quit':
                 break
 
+            # Nothing to send if the user just pressed Enter
+            if not user_query.strip():
+                continue
+
             # Add spacing before the prompt
             console.print()
             # Display user query
-            console.print(f"[user]You:[/user] {user_query}")
+            console.print(USER_LABEL + user_query)
             # Add spacing before the assistant's response
             console.print()
-            console.print(f"[assistant]Assistant:[/assistant] ", end="")
-
-            # Run the agent and stream the response
-            result = await agent.arun(user_query, stream=True)
-            async for response in result:
-                if response.content:
-                    console.print(response.content, style="response", end="")
+            console.print(ASSISTANT_LABEL, end="")
+
+            # Run the agent and stream the response. Chunks are buffered and
+            # written straight to the console file, flushing on newlines or
+            # every STREAM_FLUSH_INTERVAL seconds, instead of going through
+            # console.print (and its markup parsing) once per token.
+            result = await agent.arun(with_timestamp(user_query), stream=True)
+            buf = []
+            last_flush = loop.time()
+            console.file.write(response_style_on)
+            try:
+                async for response in result:
+                    if response.content:
+                        buf.append(response.content)
+                        if "\n" in response.content or loop.time() - last_flush > STREAM_FLUSH_INTERVAL:
+                            console.file.write("".join(buf))
+                            console.file.flush()
+                            buf.clear()
+                            last_flush = loop.time()
+            finally:
+                console.file.write("".join(buf) + response_style_off)
+                console.file.flush()
 
             console.print()  # Add newline after the full response
             console.print()  # Add extra spacing after the response
@@ -189,4 +187,4 @@ You do not provide real-time market quotes, historical data, or financial advice
         await mcp_client.disconnect()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -3,69 +3,39 @@ import os
 import sys
 import asyncio
 import logging
+import time
 import gradio as gr
 from agno.models.openai import OpenAIChat
 from agno.agent import Agent
 from agno.tools.mcp import MCPTools
-from mcp import ClientSession
-from mcp.client.sse import sse_client
 from dotenv import load_dotenv
-from typing import Optional, Dict, List
-
-# Silence all logging
-class SilentFilter(logging.Filter):
-    def filter(self, record):
-        return False
-
-# Configure root logger to be silent
-root_logger = logging.getLogger()
-root_logger.addFilter(SilentFilter())
-root_logger.setLevel(logging.DEBUG)
-
-# Silence specific loggers
-for logger_name in ['agno', 'httpx', 'urllib3', 'asyncio']:
-    logger = logging.getLogger(logger_name)
-    logger.addFilter(SilentFilter())
-    logger.setLevel(logging.DEBUG)
-    logger.propagate = False
+# Sibling modules: relative imports when loaded as the client package,
+# plain imports when run as a script (python client/agno_gradio_client.py)
+if __package__:
+    from .prompts import ZERODHA_SYSTEM_PROMPT, PROMPT_CACHE_KEY, with_timestamp
+    from .mcp_hub import MCPHub
+else:
+    from prompts import ZERODHA_SYSTEM_PROMPT, PROMPT_CACHE_KEY, with_timestamp
+    from mcp_hub import MCPHub
+from typing import Optional, Dict, List, AsyncGenerator
+
+# Silence all logging. logging.disable short-circuits every logger call
+# before a record is built, so library logging costs next to nothing.
+logging.disable(logging.CRITICAL)
+logging.getLogger().addHandler(logging.NullHandler())
 
 load_dotenv()
 
-class MCPClient:
-    def __init__(self):
-        self.session: Optional[ClientSession] = None
-        self._streams_context = None
-        self._session_context = None
-
-    async def connect_to_sse_server(self, server_url: str):
-        """Connect to an MCP server running with SSE transport"""
-        try:
-            self._streams_context = sse_client(url=server_url)
-            streams = await self._streams_context.__aenter__()
-
-            self._session_context = ClientSession(*streams)
-            self.session: ClientSession = await self._session_context.__aenter__()
-
-            await self.session.initialize()
-            await self.session.list_tools()
-            return True
-        except Exception as e:
-            await self.cleanup()
-            raise e
-
-    async def cleanup(self):
-        if self._session_context:
-            await self._session_context.__aexit__(None, None, None)
-        if self._streams_context:
-            await self._streams_context.__aexit__(None, None, None)
-        self.session = None
+# Number of past turns kept, both for the agent and the chat window
+NUM_HISTORY_RESPONSES = 10
 
-    async def disconnect(self):
-        await self.cleanup()
+# Maximum time (in seconds) streamed chunks are buffered before the chat updates
+STREAM_FLUSH_INTERVAL = 0.05
 
 class ZerodhaAssistant:
     def __init__(self):
-        self.client: Optional[MCPClient] = None
+        self.hub: Optional[MCPHub] = None
+        self.subscriber_id: Optional[str] = None
         self.agent: Optional[Agent] = None
         self.connected = False
 
@@ -76,55 +46,38 @@ class ZerodhaAssistant:
 
         try:
             mcp_url = f"http://{host}:{port}/sse"
-            self.client = MCPClient()
-            await self.client.connect_to_sse_server(mcp_url)
+            self.hub = MCPHub.instance(mcp_url)
+            self.subscriber_id = await self.hub.ensure_connected()
 
             # Initialize tools and agent
-            mcp_tools = MCPTools(session=self.client.session)
+            mcp_tools = MCPTools(session=self.hub.session)
             await mcp_tools.initialize()
 
             self.agent = Agent(
-                instructions="""
-You are a Zerodha Trading Account Assistant, helping users securely manage their accounts, orders, portfolio, and positions using tools provided over MCP.
-
-# Important Instructions:
-- ALWAYS respond in plain text. NEVER use markdown formatting (no asterisks, hashes, or code blocks).
-- Respond in human-like conversational, friendly, and professional tone in concise manner.
-
-# Authentication Steps (must be followed if no access token is generated):
-1. Use the 'get_login_url' tool to generate a Kite login URL and ask the user to log in and send the request token to you. Use this tool automatically when the user is not authenticated.
-2. Use the 'get_access_token' tool with the request token to generate and validate the access token.
-3. Proceed only if the access token is valid.
-
-# Responsibilities:
-- Check if the user is authenticated (e.g., by calling 'get_user_profile').
-- Assist with order placement ('place_order'), modification ('modify_order'), and cancellation ('cancel_order').
-- Provide insights on portfolio holdings ('get_holdings'), positions ('get_positions'), and available margin ('get_margins').
-- Track order status ('get_orders'), execution details ('get_order_trades'), and trade history ('get_order_history').
-- Any more tools can be used if needed.
-
-# Limitations:
-You do not provide real-time market quotes, historical data, or financial advice. Your role is to ensure secure, efficient, and compliant account management.
-""",
-                model=OpenAIChat(id="gpt-4o"),
+                instructions=ZERODHA_SYSTEM_PROMPT,
+                model=OpenAIChat(
+                    id="gpt-4o",
+                    request_params={"extra_body": {"prompt_cache_key": PROMPT_CACHE_KEY}}
+                ),
                 tools=[mcp_tools],
                 show_tool_calls=False,
                 markdown=False,
                 add_history_to_messages=True,
-                num_history_responses=10,
+                num_history_responses=NUM_HISTORY_RESPONSES,
                 read_tool_call_history=True,
                 read_chat_history=True,
                 tool_call_limit=10,
                 telemetry=False,
-                add_datetime_to_instructions=True
+                add_datetime_to_instructions=False
             )
 
             self.connected = True
             return "Connected successfully! Ready to assist you."
         except Exception as e:
-            if self.client:
-                await self.client.disconnect()
-            self.client = None
+            if self.subscriber_id:
+                await self.hub.release(self.subscriber_id)
+            self.hub = None
+            self.subscriber_id = None
             self.agent = None
             self.connected = False
             return f"Failed to connect: {str(e)}"
@@ -135,178 +88,217 @@ You do not provide real-time market quotes, historical data, or financial advice
             return "Not connected!"
 
         try:
-            if self.client:
-                await self.client.disconnect()
-            self.client = None
-            self.agent = None
-            self.connected = False
+            if self.subscriber_id:
+                await self.hub.release(self.subscriber_id)
             return "Disconnected successfully!"
         except Exception as e:
             return f"Error during disconnect: {str(e)}"
+        finally:
+            # The hub has dropped this subscriber even if closing the
+            # connection failed, so the session is disconnected either way
+            self.hub = None
+            self.subscriber_id = None
+            self.agent = None
+            self.connected = False
 
-    async def chat(self, message: str, history: List[List[str]]) -> str:
-        """Process a chat message"""
-        if not self.connected or not self.agent:
-            return "Not connected to MCP server! Please connect first."
-
-        try:
-            response = await self.agent.arun(message, stream=False)
-            return response.content
-        except Exception as e:
-            return f"Error: {str(e)}"
+# One assistant per browser session, keyed by Gradio's session hash. Sessions
+# connected to the same server share the MCP connection held by its MCPHub.
+assistants: Dict[str, ZerodhaAssistant] = {}
 
-# Create assistant instance
-assistant = ZerodhaAssistant()
+def get_assistant(request: gr.Request) -> ZerodhaAssistant:
+    """Return the assistant for the calling browser session"""
+    if request.session_hash not in assistants:
+        assistants[request.session_hash] = ZerodhaAssistant()
+    return assistants[request.session_hash]
 
-async def connect_handler(host: str, port: str) -> str:
+async def connect_handler(host: str, port: str, request: gr.Request) -> str:
     """Handle connection button click"""
     try:
         port_num = int(port)
-        return await assistant.connect(host, port_num)
+        return await get_assistant(request).connect(host, port_num)
     except ValueError:
         return "Invalid port number!"
     except Exception as e:
         return f"Connection error: {str(e)}"
 
-async def disconnect_handler() -> str:
+async def disconnect_handler(request: gr.Request) -> str:
     """Handle disconnection button click"""
-    return await assistant.disconnect()
+    return await get_assistant(request).disconnect()
+
+async def unload_handler(request: gr.Request):
+    """Release the session's share of the MCP connection when the tab closes"""
+    assistant = assistants.pop(request.session_hash, None)
+    if assistant:
+        await assistant.disconnect()
+
+async def chat_handler(message: str, history: List[List[str]], request: gr.Request) -> AsyncGenerator[List[List[str]], None]:
+    """Handle chat messages, streaming the reply into the chat window"""
+    assistant = get_assistant(request)
+    if not message.strip():
+        yield history
+        return
+
+    # Only the last NUM_HISTORY_RESPONSES turns are shown, matching what the
+    # agent keeps in its own history
+    history = history[-(NUM_HISTORY_RESPONSES - 1):]
 
-async def chat_handler(message: str, history: List[List[str]]) -> List[List[str]]:
-    """Handle chat messages"""
     if not assistant.connected or not assistant.agent:
-        return history + [[message, "Not connected to MCP server! Please connect first."]]
+        yield history + [[message, "Not connected to MCP server! Please connect first."]]
+        return
 
+    # The in-progress turn only goes into the lists that are yielded. history
+    # itself is never modified, so a cancelled stream leaves nothing half-written
     try:
-        response = await assistant.agent.arun(message, stream=False)
-        return history + [[message, response.content]]
+        result = await assistant.agent.arun(with_timestamp(message), stream=True)
+        # Coalesce tokens so the UI is updated at most every
+        # STREAM_FLUSH_INTERVAL seconds rather than once per token
+        buf = []
+        last_flush = time.monotonic()
+        async for response in result:
+            if response.content:
+                buf.append(response.content)
+                if time.monotonic() - last_flush > STREAM_FLUSH_INTERVAL:
+                    yield history + [[message, "".join(buf)]]
+                    last_flush = time.monotonic()
+        reply = "".join(buf)
     except Exception as e:
-        return history + [[message, f"Error: {str(e)}"]]
-
-# Create the Gradio interface
-with gr.Blocks(title="Zerodha Trading Assistant", theme=gr.themes.Soft(
-    primary_hue="indigo",
-    secondary_hue="slate",
-    neutral_hue="slate",
-    font=gr.themes.GoogleFont("Inter")
-)) as demo:
-    gr.Markdown(
-        """
-        <div style="text-align: center; margin-bottom: 1rem">
-            <h1 style="margin-bottom: 0.5rem">🤖 Zerodha AI Trading Assistant</h1>
-            <p style="margin: 0; opacity: 0.8">Manage your Zerodha account via secure MCP connection</p>
-        </div>
-        """
-    )
-
-    with gr.Row():
-        with gr.Column(scale=3):
-            gr.Markdown("### 🔌 MCP Connection")
-            with gr.Group():
-                status_box = gr.Textbox(
-                    label="Status",
-                    placeholder="Not connected",
-                    interactive=False,
-                    show_label=False,
-                )
-                with gr.Row():
-                    host_input = gr.Textbox(
-                        label="Host",
-                        value=os.environ.get("MCP_HOST", "localhost"),
-                        lines=1,
-                        scale=7,
-                        container=False,
-                    )
-                    port_input = gr.Textbox(
-                        label="Port",
-                        value=os.environ.get("MCP_PORT", "8001"),
-                        lines=1,
-                        scale=3,
-                        container=False,
+        reply = f"Error: {str(e)}"
+    yield history + [[message, reply]]
+
+def build_demo() -> gr.Blocks:
+    """Create the Gradio interface"""
+    with gr.Blocks(title="Zerodha Trading Assistant", theme=gr.themes.Soft(
+        primary_hue="indigo",
+        secondary_hue="slate",
+        neutral_hue="slate",
+        font=gr.themes.GoogleFont("Inter")
+    )) as demo:
+        gr.Markdown(
+            """
+            <div style="text-align: center; margin-bottom: 1rem">
+                <h1 style="margin-bottom: 0.5rem">🤖 Zerodha AI Trading Assistant</h1>
+                <p style="margin: 0; opacity: 0.8">Manage your Zerodha account via secure MCP connection</p>
+            </div>
+            """
+        )
+
+        with gr.Row():
+            with gr.Column(scale=3):
+                gr.Markdown("### 🔌 MCP Connection")
+                with gr.Group():
+                    status_box = gr.Textbox(
+                        label="Status",
+                        placeholder="Not connected",
+                        interactive=False,
+                        show_label=False,
                     )
-                with gr.Row():
-                    connect_btn = gr.Button("Connect", variant="primary", scale=2)
-                    disconnect_btn = gr.Button("Disconnect", scale=1)
-
-    with gr.Row():
-        chatbot = gr.Chatbot(
-            value=[],
-            label="Chat",
-            height=450,
-            show_label=False,
-            avatar_images=["https://api.dicebear.com/7.x/bottts/svg?seed=user", "https://api.dicebear.com/7.x/bottts/svg?seed=assistant"],
-            bubble_full_width=False,
+                    with gr.Row():
+                        host_input = gr.Textbox(
+                            label="Host",
+                            value=os.environ.get("MCP_HOST", "localhost"),
+                            lines=1,
+                            scale=7,
+                            container=False,
+                        )
+                        port_input = gr.Textbox(
+                            label="Port",
+                            value=os.environ.get("MCP_PORT", "8001"),
+                            lines=1,
+                            scale=3,
+                            container=False,
+                        )
+                    with gr.Row():
+                        connect_btn = gr.Button("Connect", variant="primary", scale=2)
+                        disconnect_btn = gr.Button("Disconnect", scale=1)
+
+        with gr.Row():
+            chatbot = gr.Chatbot(
+                value=[],
+                label="Chat",
+                height=450,
+                show_label=False,
+                avatar_images=["https://api.dicebear.com/7.x/bottts/svg?seed=user", "https://api.dicebear.com/7.x/bottts/svg?seed=assistant"],
+                bubble_full_width=False,
+            )
+
+        with gr.Row():
+            msg_box = gr.Textbox(
+                label="Message",
+                placeholder="Connect to MCP server first...",
+                lines=1,
+                max_lines=1,
+                show_label=False,
+                scale=20,
+                container=False,
+                interactive=False,  # Start as disabled
+            )
+            send_btn = gr.Button("Send", scale=3, size="sm", interactive=False)  # Start as disabled
+
+        # Set up event handlers
+        def enable_chat(status_text):
+            """Enable/disable chat based on connection status"""
+            is_connected = "Connected successfully" in status_text
+            return {
+                msg_box: gr.update(
+                    interactive=is_connected,
+                    placeholder="Type your message here..." if is_connected else "Connect to MCP server first..."
+                ),
+                send_btn: gr.update(interactive=is_connected),
+            }
+
+        connect_btn.click(
+            fn=connect_handler,
+            inputs=[host_input, port_input],
+            outputs=status_box,
+        ).then(
+            fn=enable_chat,
+            inputs=[status_box],
+            outputs=[msg_box, send_btn],
+        )
+
+        disconnect_btn.click(
+            fn=disconnect_handler,
+            inputs=[],
+            outputs=status_box,
+        ).then(
+            fn=enable_chat,
+            inputs=[status_box],
+            outputs=[msg_box, send_btn],
         )
 
-    with gr.Row():
-        msg_box = gr.Textbox(
-            label="Message",
-            placeholder="Connect to MCP server first...",
-            lines=1,
-            max_lines=1,
-            show_label=False,
-            scale=20,
-            container=False,
-            interactive=False,  # Start as disabled
+        # Chat submission can happen through either the textbox or send button
+        msg_box.submit(
+            fn=chat_handler,
+            inputs=[msg_box, chatbot],
+            outputs=[chatbot],
+            show_progress=True,
+            api_name=False,
+            concurrency_limit=None,  # Each session streams from its own agent
+        ).then(
+            fn=lambda: "",  # Clear input after sending
+            inputs=None,
+            outputs=msg_box,
         )
-        send_btn = gr.Button("Send", scale=3, size="sm", interactive=False)  # Start as disabled
-
-    # Set up event handlers
-    def enable_chat(status_text):
-        """Enable/disable chat based on connection status"""
-        is_connected = "Connected successfully" in status_text
-        return {
-            msg_box: gr.update(
-                interactive=is_connected,
-                placeholder="Type your message here..." if is_connected else "Connect to MCP server first..."
-            ),
-            send_btn: gr.update(interactive=is_connected),
-        }
-
-    connect_btn.click(
-        fn=connect_handler,
-        inputs=[host_input, port_input],
-        outputs=status_box,
-    ).then(
-        fn=enable_chat,
-        inputs=[status_box],
-        outputs=[msg_box, send_btn],
-    )
-
-    disconnect_btn.click(
-        fn=disconnect_handler,
-        inputs=[],
-        outputs=status_box,
-    ).then(
-        fn=enable_chat,
-        inputs=[status_box],
-        outputs=[msg_box, send_btn],
-    )
-
-    # Chat submission can happen through either the textbox or send button
-    msg_box.submit(
-        fn=chat_handler,
-        inputs=[msg_box, chatbot],
-        outputs=[chatbot],
-        show_progress=True,
-    ).then(
-        fn=lambda: "",  # Clear input after sending
-        inputs=None,
-        outputs=msg_box,
-    )
-
-    send_btn.click(
-        fn=chat_handler,
-        inputs=[msg_box, chatbot],
-        outputs=[chatbot],
-        show_progress=True,
-    ).then(
-        fn=lambda: "",  # Clear input after sending
-        inputs=None,
-        outputs=msg_box,
-    )
+
+        send_btn.click(
+            fn=chat_handler,
+            inputs=[msg_box, chatbot],
+            outputs=[chatbot],
+            show_progress=True,
+            api_name=False,
+            concurrency_limit=None,  # Each session streams from its own agent
+        ).then(
+            fn=lambda: "",  # Clear input after sending
+            inputs=None,
+            outputs=msg_box,
+        )
+
+        demo.unload(unload_handler)
+
+    return demo
 
 if __name__ == "__main__":
+    demo = build_demo()
     demo.launch(
         server_name="0.0.0.0",  # Listen on all interfaces
         show_api=False,
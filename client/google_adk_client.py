@@ -2,9 +2,15 @@
 import os
 import logging
 import argparse
-import asyncio
-from contextlib import AsyncExitStack
 from dotenv import load_dotenv
+# Sibling modules: relative imports when loaded as the client package,
+# plain imports when run as a script (python client/google_adk_client.py)
+if __package__:
+    from .event_loop import run
+    from .prompts import ZERODHA_ADK_SYSTEM_PROMPT
+else:
+    from event_loop import run
+    from prompts import ZERODHA_ADK_SYSTEM_PROMPT
 from google.adk.agents.llm_agent import LlmAgent
 #from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, SseServerParams
 from google.adk.tools.mcp_tool.mcp_toolset import McpToolset, SseConnectionParams
@@ -15,6 +21,7 @@ from google.genai import types
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.prompt import Prompt
+from rich.text import Text
 from rich.theme import Theme
 from google.adk.agents import Agent
 from google.adk.tools import AgentTool
@@ -46,12 +53,19 @@ custom_theme = Theme({
 # Initialize rich console with custom theme
 console = Console(theme=custom_theme)
 
+# Pre-parsed markup for the text printed on every turn
+QUERY_PROMPT = Text.from_markup("[query]Enter your query:[/query] [dim](or 'quit' to exit)[/dim]")
+WELCOME_MESSAGE = Text.from_markup("[info]Welcome to Zerodha! (Running in non-live test mode)[/info]")
+USER_LABEL = Text.from_markup("[user]You:[/user] ")
+ASSISTANT_LABEL = Text.from_markup("[assistant]Assistant:[/assistant] ")
+
 load_dotenv()
 
 # Define constants for Runner
 APP_NAME = "zerodha_mcp_client"
 USER_ID = "cli_user"
 SESSION_ID = "cli_session"
+USER_ROLE = "user"
 
 #### Create a Search sub-agent ###############
 search_agent = Agent(
@@ -78,48 +92,20 @@ async def main():
     mcp_port = args.port or int(os.environ.get("MCP_PORT", "8001"))
     mcp_url = f"http://{mcp_host}:{mcp_port}/sse"
 
-    exit_stack = AsyncExitStack()
+    # Use MCPToolset to connect and get tools. The toolset opens its SSE
+    # connection lazily and owns it, so closing it is all the cleanup needed.
+    logger.debug(f"[info]Connecting to MCP server at {mcp_url} via MCPToolset...[/info]")
+    tools1 = McpToolset(
+        connection_params=SseConnectionParams(url=mcp_url)
+    )
 
     try:
-        # Use MCPToolset to connect and get tools
-        logger.debug(f"[info]Connecting to MCP server at {mcp_url} via MCPToolset...[/info]")
-        tools1 = McpToolset(
-            connection_params=SseConnectionParams(url=mcp_url)
-        )
-        # Push the toolset's exit stack onto our main exit stack for cleanup
-        # await exit_stack.enter_async_context(toolset_exit_stack)
-
-        # No need to call get_tools() again, 'tools' is already the list
-        # logger.debug(f"[info]MCPToolset loaded {len(tools)} tools from server[/info]")
-
         # Create the Google ADK agent
         agent = LlmAgent(
             name="zerodha_trading_assistant",
             model="gemini-3-flash-preview", # Ensure this model is available/correct
             description="Zerodha Trading Account Assistant via MCP",
-            instruction="""
-You are a Zerodha Trading Account Assistant, helping users securely manage their accounts, orders, portfolio, and positions using tools provided over MCP.
-
-# Important Instructions:
-- ALWAYS respond in plain text. NEVER use markdown formatting (no asterisks, hashes, or code blocks).
-- Respond in human-like conversational, friendly, and professional tone in concise manner.
-
-# Authentication Steps (must be followed if no access token is generated):
-1. Use the 'get_login_url' tool to generate a Kite login URL and ask the user to log in and send the request token to you. Use this tool automatically when the user is not authenticated.
-2. Use the 'get_access_token' tool with the request token to generate and validate the access token.
-3. Proceed only if the access token is valid.
-
-# Responsibilities:
-- Check if the user is authenticated (e.g., by calling 'get_user_profile').
-- Assist with order placement ('place_order'), modification ('modify_order'), and cancellation ('cancel_order').
-- Provide insights on portfolio holdings ('get_holdings'), positions ('get_positions'), and available margin ('get_margins').
-- Track order status ('get_orders'), execution details ('get_order_trades'), and trade history ('get_order_history').
-- You can use search_agent_tool tool to search for information on the internet for any company or stock.
-- Any more tools can be used if needed.
-
-# Limitations:
-# You do not provide real-time market quotes, historical data, or financial advice. Your role is to ensure secure, efficient, and compliant account management.
-""",
+            instruction=ZERODHA_ADK_SYSTEM_PROMPT,
             tools=[tools1,search_agent_tool],
         )
 
@@ -138,26 +124,32 @@ You are a Zerodha Trading Account Assistant, helping users securely manage their
 
         # Welcome message
         console.print()
-        console.print("[info]Welcome to Zerodha! (Running in non-live test mode)[/info]", style="response")
+        console.print(WELCOME_MESSAGE, style="response")
 
         # Main user input loop
         while True:
             console.print() # Spacing before prompt
             try:
                 # No need for asyncio.to_thread for non-live prompt
-                user_query = Prompt.ask("[query]Enter your query:[/query] [dim](or 'quit' to exit)[/dim]")
+                user_query = Prompt.ask(QUERY_PROMPT, console=console)
             except EOFError:
                 user_query = 'quit'
 
             if user_query.lower() == 'quit':
                 break
 
-            console.print(f"[user]You:[/user] {user_query}")
+            # Nothing to send if the user just pressed Enter
+            if not user_query.strip():
+                continue
+
+            console.print(USER_LABEL + user_query)
             console.print()
 
-            user_content = types.Content(role='user', parts=[types.Part.from_text(text=user_query)])
+            # user_query is always a plain str, so skip pydantic validation
+            # when building the Part
+            user_content = types.Content(role=USER_ROLE, parts=[types.Part.model_construct(text=user_query)])
 
-            final_response_text = ""
+            response_parts = []
             try:
                 events_async = runner.run_async(
                     session_id=session.id,
@@ -168,22 +160,23 @@ You are a Zerodha Trading Account Assistant, helping users securely manage their
                      if event.is_final_response() and event.content:
                          for part in event.content.parts:
                             if part.text:
-                                final_response_text += part.text
+                                response_parts.append(part.text)
+                final_response_text = "".join(response_parts)
 
             except Exception as runner_ex:
                  logger.error(f"[danger]Error during runner execution: {runner_ex}[/danger]", exc_info=True)
-                 final_response_text = f"[bold red]Error: {runner_ex}[/bold red]"
+                 final_response_text = Text(f"Error: {runner_ex}", style="bold red")
 
             # Print the final accumulated response
-            console.print(f"[assistant]Assistant:[/assistant] {final_response_text}", style="response")
+            console.print(ASSISTANT_LABEL + final_response_text, style="response")
             console.print() # Add extra spacing
 
     except Exception as e:
         logger.error(f"[danger]Error in main execution loop: {e}[/danger]", exc_info=True)
     finally:
-        await exit_stack.aclose()
+        await tools1.close()
         logger.debug("[info]MCPToolset connection closed and resources cleaned up.[/info]")
         console.print("[info]Exiting client.[/info]")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run(main())
\ No newline at end of file
@@ -0,0 +1,69 @@
+# mcp_hub.py
+import asyncio
+from contextlib import AsyncExitStack
+from typing import Dict, Optional, Set
+from uuid import uuid4
+from mcp import ClientSession
+# Sibling modules: relative imports when loaded as the client package,
+# plain imports when client/ itself is on sys.path
+if __package__:
+    from .sse_utils import open_sse_session
+    from .tool_cache import install_tool_cache, pin_tool_list
+else:
+    from sse_utils import open_sse_session
+    from tool_cache import install_tool_cache, pin_tool_list
+
+class MCPHub:
+    """MCP session shared by all Gradio users of one server URL.
+
+    There is one hub per server URL. Every caller of ensure_connected gets
+    its own subscriber id. The SSE connection is opened for the first
+    subscriber and closed once the last one is released, so any number of
+    browser tabs share one stream to each server.
+    """
+
+    _instances: Dict[str, "MCPHub"] = {}
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url
+        self.session: Optional[ClientSession] = None
+        self.subscribers: Set[str] = set()
+        self._exit_stack = AsyncExitStack()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def instance(cls, server_url: str) -> "MCPHub":
+        """Return the hub for server_url, creating it on first use"""
+        if server_url not in cls._instances:
+            cls._instances[server_url] = cls(server_url)
+        return cls._instances[server_url]
+
+    async def ensure_connected(self) -> str:
+        """Connect to the MCP server if needed and register a new subscriber"""
+        async with self._lock:
+            if self.session is None:
+                self.session = await open_sse_session(self.server_url, self._exit_stack)
+                install_tool_cache(self.session)
+                try:
+                    # List available tools to verify connection; later calls reuse the result
+                    await pin_tool_list(self.session)
+                except Exception as e:
+                    await self._close()
+                    raise e
+
+            subscriber_id = str(uuid4())
+            self.subscribers.add(subscriber_id)
+            return subscriber_id
+
+    async def release(self, subscriber_id: str):
+        """Drop a subscriber, closing the connection when none are left"""
+        async with self._lock:
+            self.subscribers.discard(subscriber_id)
+            if not self.subscribers and self.session is not None:
+                await self._close()
+
+    async def _close(self):
+        try:
+            await self._exit_stack.aclose()
+        finally:
+            self.session = None
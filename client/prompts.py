@@ -0,0 +1,61 @@
+# prompts.py
+import sys
+from datetime import datetime
+from typing import Final, Sequence
+
+_LIMITATIONS = "You do not provide real-time market quotes, historical data, or financial advice. Your role is to ensure secure, efficient, and compliant account management."
+
+def _build_prompt(extra_responsibilities: Sequence[str] = (), limitations: str = _LIMITATIONS) -> str:
+    """Assemble the system prompt, optionally listing extra tools the client has"""
+    return sys.intern("\n".join([
+        "",
+        "You are a Zerodha Trading Account Assistant, helping users securely manage their accounts, orders, portfolio, and positions using tools provided over MCP.",
+        "",
+        "# Important Instructions:",
+        "- ALWAYS respond in plain text. NEVER use markdown formatting (no asterisks, hashes, or code blocks).",
+        "- Respond in human-like conversational, friendly, and professional tone in concise manner.",
+        "",
+        "# Authentication Steps (must be followed if no access token is generated):",
+        "1. Use the 'get_login_url' tool to generate a Kite login URL and ask the user to log in and send the request token to you. Use this tool automatically when the user is not authenticated.",
+        "2. Use the 'get_access_token' tool with the request token to generate and validate the access token.",
+        "3. Proceed only if the access token is valid.",
+        "",
+        "# Responsibilities:",
+        "- Check if the user is authenticated (e.g., by calling 'get_user_profile').",
+        "- Assist with order placement ('place_order'), modification ('modify_order'), and cancellation ('cancel_order').",
+        "- Provide insights on portfolio holdings ('get_holdings'), positions ('get_positions'), and available margin ('get_margins').",
+        "- Track order status ('get_orders'), execution details ('get_order_trades'), and trade history ('get_order_history').",
+        *extra_responsibilities,
+        "- Any more tools can be used if needed.",
+        "",
+        "# Limitations:",
+        limitations,
+        "",
+    ]))
+
+# Static system prompt shared by the clients. Keep this free of timestamps,
+# session IDs or anything else that changes between turns so the prefix
+# stays identical and can be served from the provider's prompt cache.
+ZERODHA_SYSTEM_PROMPT: Final[str] = _build_prompt()
+
+# Variant used by the Google ADK client, which also exposes the search sub-agent.
+# It keeps the "# " prefix its limitations line had in the original ADK prompt,
+# so the Gemini prompt is unchanged.
+ZERODHA_ADK_SYSTEM_PROMPT: Final[str] = _build_prompt(
+    ["- You can use search_agent_tool tool to search for information on the internet for any company or stock."],
+    limitations=f"# {_LIMITATIONS}",
+)
+
+def with_timestamp(user_query: str) -> str:
+    """Prefix the user message with the current time.
+
+    The datetime used to live in the instructions, which changed the prompt
+    prefix on every turn; sending it with the user message keeps the system
+    prompt cacheable.
+    """
+    return f"[now: {datetime.now().isoformat(timespec='seconds')}]\n{user_query}"
+
+# Routing hint for OpenAI's prompt cache. Requests that share this key (and
+# the static prefix above) are sent to the same cache shard, which keeps hit
+# rates up across turns and across clients.
+PROMPT_CACHE_KEY: Final[str] = "zerodha-assistant"
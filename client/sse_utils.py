@@ -0,0 +1,30 @@
+# sse_utils.py
+from contextlib import AsyncExitStack
+from mcp import ClientSession
+from mcp.types import InitializeResult
+from mcp.client.sse import sse_client
+
+async def open_sse_session(server_url: str, exit_stack: AsyncExitStack) -> ClientSession:
+    """Open the SSE transport and an initialized MCP session on top of it.
+
+    Both contexts are pushed onto exit_stack, so closing the stack tears the
+    session and the stream down in the right order. If the handshake fails the
+    stack is closed before the error is re-raised.
+
+    The handshake result is kept and returned by later session.initialize()
+    calls. MCPTools.initialize re-runs the handshake on the session it is
+    given, which would otherwise cost another round trip on every connect.
+    """
+    try:
+        streams = await exit_stack.enter_async_context(sse_client(url=server_url))
+        session = await exit_stack.enter_async_context(ClientSession(*streams))
+        init_result = await session.initialize()
+    except BaseException:
+        await exit_stack.aclose()
+        raise
+
+    async def initialized() -> InitializeResult:
+        return init_result
+
+    session.initialize = initialized
+    return session
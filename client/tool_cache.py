@@ -0,0 +1,111 @@
+# tool_cache.py
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+from mcp import ClientSession
+from mcp.types import ListToolsResult
+
+# Read-only tools whose results can be reused for a short while
+CACHEABLE_TOOLS = frozenset({
+    'get_user_profile',
+    'get_holdings',
+    'get_positions',
+    'get_margins',
+    'get_orders',
+})
+
+# Tools that change account state (orders, login); calling one invalidates
+# everything cached so far
+MUTATING_TOOLS = frozenset({
+    'place_order',
+    'modify_order',
+    'cancel_order',
+    'get_access_token',
+})
+
+class ToolLRU:
+    """Fixed-capacity LRU cache of tool results with a per-entry TTL"""
+
+    def __init__(self, cap: int = 100, ttl: float = 30.0):
+        self.cap = cap
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Bumped on every clear, so callers can tell whether a result they
+        # fetched predates an invalidation
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.cap:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.generation += 1
+
+def tool_cache_key(name: str, arguments: Optional[dict]) -> Tuple[str, str]:
+    """Build a cache key that does not depend on argument order"""
+    return name, json.dumps(arguments or {}, sort_keys=True, default=str)
+
+def install_tool_cache(session: ClientSession, cache: Optional[ToolLRU] = None) -> ToolLRU:
+    """Route session.call_tool through an LRU cache.
+
+    Results of CACHEABLE_TOOLS are served from the cache until they expire.
+    Calling one of MUTATING_TOOLS drops everything cached, both before and
+    after the call; other tools pass straight through.
+    """
+    cache = cache or ToolLRU()
+    call_tool = session.call_tool
+
+    async def cached_call_tool(name: str, arguments: Optional[dict] = None, *args, **kwargs):
+        if name in MUTATING_TOOLS:
+            cache.clear()
+            try:
+                return await call_tool(name, arguments, *args, **kwargs)
+            finally:
+                # Reads that were in flight during the call may have cached
+                # pre-mutation results after the first clear
+                cache.clear()
+        if name not in CACHEABLE_TOOLS:
+            return await call_tool(name, arguments, *args, **kwargs)
+
+        key = tool_cache_key(name, arguments)
+        result = cache.get(key)
+        if result is None:
+            generation = cache.generation
+            result = await call_tool(name, arguments, *args, **kwargs)
+            # Skip storing if a mutating tool ran while this read was in flight
+            if not getattr(result, 'isError', False) and cache.generation == generation:
+                cache.put(key, result)
+        return result
+
+    session.call_tool = cached_call_tool
+    return cache
+
+async def pin_tool_list(session: ClientSession) -> ListToolsResult:
+    """Fetch the tool list once and answer later list_tools calls from it.
+
+    The server registers its tools at startup, so the list cannot change for
+    the lifetime of a session; MCPTools.initialize then resolves immediately
+    instead of making another round trip.
+    """
+    tools = await session.list_tools()
+
+    async def cached_list_tools(*args, **kwargs) -> ListToolsResult:
+        return tools
+
+    session.list_tools = cached_list_tools
+    return tools